@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline end-to-end benchmark for the dtcdecode.com scraper (Landrover.py).
+
+- Generates a synthetic dtcdecode-like site at any scale: paginated listing pages with a
+  "Load more" button, detail pages with h2/h3 sections, lists and tables, robots.txt and a
+  (gzipped) sitemap index, all deterministic for a given --seed
+- Serves it from a local HTTP server in its own process (optional per-response latency, and
+  429 + Retry-After throttling via --throttle-every / --throttle-stuck),
+  then runs scrape_oem against it: live (HTTP or browser), then replayed from the HTML cache
+- Measures pages/s, parse ms/page and the other stage timings (from <OEM>_metrics.json),
+  peak RSS and output bytes; micro-benchmarks parse_detail_page (per installed backend),
+  extract_sections vs stream_sections (time and peak memory) and dtc_to_hex_triplet
+- Results are saved as JSON; --compare old.json prints the deltas and exits 1 on regressions
+
+Usage:
+  python bench_scrape.py                                  # 2000 DTCs, HTTP fetcher, sitemap discovery
+  python bench_scrape.py --codes 20000 --latency-ms 20 --concurrency 8 --parse-workers 4
+  python bench_scrape.py --fetcher browser                # listing crawl + load-more in Chromium
+  python bench_scrape.py --out base.json && python bench_scrape.py --compare base.json
+
+Install:
+  python -m pip install aiohttp            # --fetcher http (the default)
+"""
+
+import argparse, gzip, http.server, json, multiprocessing as mp, os, platform, random, shutil, socketserver
+import subprocess, sys, tempfile, threading, time, timeit, tracemalloc, zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import Landrover as L
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# outside the source tree; pass --out to keep a baseline somewhere permanent
+RESULTS_DIR = os.path.join(tempfile.gettempdir(), "dtc_bench_results")
+
+# -------------------------------- synthetic site --------------------------------
+_WORDS = ("sensor circuit module signal voltage harness connector relay supply ground control unit "
+          "pressure temperature position switch actuator valve motor solenoid feedback reference "
+          "communication network bus message timeout range performance intermittent calibration").split()
+_SYSTEMS = ("Body Control Module", "Powertrain Control Module", "Anti-lock Brake Module", "Instrument Cluster",
+            "Transmission Control Module", "Restraints Control Module", "Gateway Module", "Rear Junction Box")
+_CAUSES = ("Wiring harness short to ground", "Connector corrosion or poor terminal fit", "Faulty component",
+           "Open circuit in supply line", "Module software fault", "Low battery voltage", "Water ingress")
+
+def synth_codes(n: int, seed: int=0) -> List[str]:
+    """n distinct, valid DTC codes ('P0A3B-00' shape), sorted like the real listing."""
+    rng, codes = random.Random(seed), set()
+    fmis = sorted(L.FMI_MEANINGS) + [f"{i:02X}" for i in (0x01, 0x02, 0x31, 0x49, 0x87, 0x96)]
+    if n > 4 * 0x4000 * len(fmis): raise ValueError("too many codes requested")
+    while len(codes) < n:
+        codes.add(f"{rng.choice(L.DTC_LETTERS)}{rng.randrange(0x4000):04X}-{rng.choice(fmis)}")
+    return sorted(codes)
+
+def _sentence(rng: random.Random, lo: int=8, hi: int=24) -> str:
+    w = [rng.choice(_WORDS) for _ in range(rng.randint(lo, hi))]
+    return " ".join(w).capitalize() + "."
+
+def synth_detail_page(oem: str, code: str, codes: List[str], sections: int=6, table_rows: int=6) -> str:
+    """A detail page shaped like the real ones: site chrome, consent banner, ad slots, an
+    '<CODE> – <definition>' h1, then h2/h3 sections of paragraphs, lists, tables and divs."""
+    rng = random.Random(zlib.crc32(f"{oem}/{code}".encode()))
+    value = L.dtc_to_int(code)
+    fmi = code[-2:]
+    definition = f"{rng.choice(_SYSTEMS)} {rng.choice(_WORDS).title()} {L.fmi_meaning(fmi) or 'Fault'}"
+    out = [f"""<!DOCTYPE html>
+<html lang="en-GB">
+<head>
+  <meta charset="utf-8">
+  <title>{code} {oem.replace('-', ' ')} – {definition} | DTC Decode</title>
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <link rel="stylesheet" href="/assets/site.css">
+  <style>.ad-slot{{min-height:250px}}</style>
+  <script>window.dataLayer = window.dataLayer || []; function gtag(){{dataLayer.push(arguments);}}</script>
+</head>
+<body>
+  <header class="site-header">
+    <nav><ul><li><a href="/">Home</a></li><li><a href="/{oem}">{oem.replace('-', ' ')}</a></li></ul></nav>
+  </header>
+  <div id="onetrust-banner-sdk"><p>We use cookies.</p><button id="onetrust-accept-btn-handler">Accept all</button></div>
+  <main class="container">
+    <h1>{code} – {definition}</h1>
+    <h2>Description</h2>
+    <p>The {rng.choice(_SYSTEMS)} reports <strong>{code}</strong>. {_sentence(rng)}</p>
+    <p>Failure type <code>0x{fmi}</code>: {L.fmi_meaning(fmi) or 'manufacturer specific'}.&nbsp;{_sentence(rng)}</p>
+    <div class="ad-slot"><script>(adsbygoogle = window.adsbygoogle || []).push({{}});</script></div>"""]
+    for s in range(max(0, sections - 1)):
+        tag = "h3" if s % 3 == 2 else "h2"
+        out.append(f"    <{tag}>{rng.choice(('Possible Causes', 'Symptoms', 'Diagnostic Steps', 'Conditions', 'Notes'))} {s + 1}</{tag}>")
+        kind = s % 4
+        if kind == 0:
+            out.append("    <ul>" + "".join(f"<li>{rng.choice(_CAUSES)} <em>{rng.choice(_WORDS)}</em></li>"
+                                          for _ in range(rng.randint(3, 7))) + "</ul>")
+        elif kind == 1:
+            out.append("    <ol>" + "".join(f"<li>{_sentence(rng, 5, 12)}</li>" for _ in range(rng.randint(3, 6))) + "</ol>")
+        elif kind == 2:
+            rows = [f"<tr><td>{rng.choice(_WORDS)}</td><td>{rng.randint(0, 255):02X}</td><td>{_sentence(rng, 2, 6)}</td></tr>"
+                    for _ in range(table_rows)]
+            out.append(f"""    <table class="table">
+      <thead><tr><th>Parameter</th><th>Value</th><th>Meaning</th></tr></thead>
+      <tbody><tr><td>High</td><td>{value >> 16:02X}</td><td>{code[0]} system</td></tr>{''.join(rows)}</tbody>
+    </table>""")
+        else:
+            out.append(f"    <p>{_sentence(rng)} {_sentence(rng)}</p>\n    <div><span>{_sentence(rng, 4, 8)}</span> <b>{rng.choice(_WORDS)}</b></div>")
+    related = rng.sample(codes, min(3, len(codes)))
+    out.append("    <h3>Related Codes</h3>\n    <ul>" + "".join(f'<li><a href="/{oem}/{c}">{c}</a> {L.fmi_meaning(c[-2:])}</li>'
+                                                         for c in related) + "</ul>")
+    out.append("""  </main>
+  <footer><p>&copy; 2025 DTC Decode. All rights reserved.</p></footer>
+  <script src="/assets/app.js"></script>
+</body>
+</html>
+""")
+    return "\n".join(out)
+
+def _listing_items(oem: str, codes: List[str]) -> str:
+    return "".join(f'<li><a href="/{oem}/{c}">{c}</a> {L.fmi_meaning(c[-2:])}</li>' for c in codes)
+
+def synth_listing_page(oem: str, codes: List[str], page: int, per_page: int) -> str:
+    """Page `page` (1-based) of the OEM listing: per_page links, numbered pagination, and a
+    'Load more' button that appends the following pages in place (as the real site does)."""
+    pages = max(1, -(-len(codes) // per_page))
+    chunk = codes[(page - 1) * per_page:page * per_page]
+    nav = "".join(f'<a href="/{oem}?page={p}">{p}</a> ' for p in range(1, pages + 1) if p != page)
+    more = "" if page >= pages else f"""<button id="load-more" data-next="{page + 1}">Load more</button>
+<script>
+document.getElementById('load-more').addEventListener('click', async (e) => {{
+  const b = e.target, n = +b.dataset.next;
+  const r = await fetch('/{oem}?page=' + n + '&fragment=1');
+  document.getElementById('codes').insertAdjacentHTML('beforeend', await r.text());
+  if (n >= {pages}) b.remove(); else b.dataset.next = n + 1;
+}});
+</script>"""
+    return f"""<!DOCTYPE html>
+<html lang="en-GB"><head><meta charset="utf-8"><title>{oem.replace('-', ' ')} DTC codes | DTC Decode</title></head>
+<body>
+<div id="onetrust-banner-sdk"><p>We use cookies.</p><button id="onetrust-accept-btn-handler">Accept all</button></div>
+<main><h1>{oem.replace('-', ' ')} fault codes</h1>
+<ul id="codes">{_listing_items(oem, chunk)}</ul>
+{more}
+<nav class="pagination">{nav}</nav></main>
+</body></html>
+"""
+
+class SyntheticSite:
+    """Every document of the synthetic site, rendered on demand (detail pages are cached)."""
+    def __init__(self, oem: str="Land-Rover", n_codes: int=2000, per_page: int=100, sections: int=6,
+                 table_rows: int=6, seed: int=0, sitemap_chunk: int=5000):
+        self.oem, self.per_page, self.sections, self.table_rows = oem, per_page, sections, table_rows
+        self.codes = synth_codes(n_codes, seed)
+        self._code_set = set(self.codes)
+        self.sitemap_chunk = sitemap_chunk
+        self._details: Dict[str, bytes] = {}
+
+    def sitemap_names(self) -> List[str]:
+        return [f"sitemap-{self.oem}-{i + 1}.xml.gz" for i in range(max(1, -(-len(self.codes) // self.sitemap_chunk)))]
+
+    def render(self, path: str, query: Dict[str, List[str]], base: str) -> Tuple[int, str, bytes]:
+        """(status, content type, body) for a request path."""
+        html = "text/html; charset=utf-8"
+        parts = [p for p in path.split("/") if p]
+        if not parts:
+            return 200, html, f'<html><body><a href="/{self.oem}">{self.oem}</a></body></html>'.encode()
+        if path == "/robots.txt":
+            return 200, "text/plain", f"User-agent: *\nAllow: /\nSitemap: {base}/sitemap.xml\n".encode()
+        if path == "/sitemap.xml":
+            locs = "".join(f"<sitemap><loc>{base}/{n}</loc></sitemap>" for n in self.sitemap_names())
+            return 200, "application/xml", f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex>{locs}</sitemapindex>'.encode()
+        if parts[0] in self.sitemap_names():
+            i = self.sitemap_names().index(parts[0])
+            chunk = self.codes[i * self.sitemap_chunk:(i + 1) * self.sitemap_chunk]
+            body = "".join(f"<url><loc>{base}/{self.oem}/{c}</loc></url>" for c in chunk)
+            return 200, "application/x-gzip", gzip.compress(f'<?xml version="1.0"?><urlset>{body}</urlset>'.encode(), 6)
+        if parts[0] == "assets":
+            return 200, "text/css" if path.endswith(".css") else "application/javascript", b"/* synthetic */\n"
+        if parts[0] != self.oem: return 404, html, b"<html><body>Not found</body></html>"
+        if len(parts) == 1:
+            page = int(query.get("page", ["1"])[0])
+            if "fragment" in query:
+                return 200, html, _listing_items(self.oem, self.codes[(page - 1) * self.per_page:page * self.per_page]).encode()
+            return 200, html, synth_listing_page(self.oem, self.codes, page, self.per_page).encode()
+        code = parts[1].upper()
+        if code not in self._code_set: return 404, html, b"<html><body>Not found</body></html>"
+        body = self._details.get(code)
+        if body is None:
+            body = self._details[code] = synth_detail_page(self.oem, code, self.codes, self.sections, self.table_rows).encode()
+        return 200, html, body
+
+# ---------------------------------- server --------------------------------------
+# what a rate-limiting front end sends back; parsing it as a detail page would yield a bogus record
+THROTTLE_PAGE = b"<html><head><title>429 Too Many Requests</title></head><body><h1>Too Many Requests</h1>" \
+                b"<h2>Slow down</h2><p>You are sending requests too quickly.</p></body></html>"
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def _serve(site_kw: Dict[str, Any], latency: float, port_q: "mp.Queue", throttle: Optional[Dict[str, Any]]=None):
+    site = SyntheticSite(**site_kw)
+    throttle = throttle or {}
+    every, stuck, retry_after = throttle.get("every", 0), set(site.codes[:throttle.get("stuck", 0)]), throttle.get("retry_after", 1.0)
+    served = [0]; lock = threading.Lock()
+
+    def throttled(parts: List[str]) -> bool:
+        """Detail pages only: the first `stuck` codes always, plus every `every`-th detail response."""
+        if len(parts) != 2 or parts[0] != site.oem: return False
+        if parts[1].upper() in stuck: return True
+        if not every: return False
+        with lock: served[0] += 1; return served[0] % every == 0
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def log_message(self, *a): pass
+        def do_GET(self):
+            if latency: time.sleep(latency)
+            u = urlparse(self.path)
+            base = f"http://{self.headers.get('Host', '127.0.0.1')}"
+            if throttled([p for p in u.path.split("/") if p]):
+                status, ctype, body = 429, "text/html; charset=utf-8", THROTTLE_PAGE
+            else:
+                status, ctype, body = site.render(u.path.rstrip("/") or "/", parse_qs(u.query), base)
+            self.send_response(status)
+            if status == 429: self.send_header("Retry-After", f"{retry_after:g}")
+            self.send_header("Content-Type", ctype); self.send_header("Content-Length", str(len(body)))
+            self.end_headers(); self.wfile.write(body)
+
+    srv = _Server(("127.0.0.1", 0), Handler)
+    port_q.put(srv.server_address[1])
+    srv.serve_forever()
+
+def start_server(site_kw: Dict[str, Any], latency: float=0.0,
+                 throttle: Optional[Dict[str, Any]]=None) -> Tuple[str, mp.Process]:
+    """Serve the synthetic site from a separate process (keeps it off the scraper's CPU and RSS).
+    `throttle` ({"every", "stuck", "retry_after"}) answers some detail pages with 429 + Retry-After."""
+    q: "mp.Queue" = mp.Queue()
+    proc = mp.Process(target=_serve, args=(site_kw, latency, q, throttle), daemon=True)
+    proc.start()
+    return f"http://127.0.0.1:{q.get(timeout=30)}", proc
+
+# -------------------------------- measurements ----------------------------------
+def peak_rss_mb() -> Optional[float]:
+    if resource is None: return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(kb / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)   # bytes on macOS, KiB elsewhere
+
+def _scrape_result(summary: Dict[str, Any], seconds: float, rss_before: Optional[float]) -> Dict[str, Any]:
+    with open(summary["metrics"], encoding="utf-8") as f: metrics = json.load(f)
+    stages = {k: {m: v[m] for m in ("count", "mean_ms", "p50_ms", "p90_ms", "p99_ms")} for k, v in metrics["stages"].items()}
+    outputs = {os.path.basename(p): os.path.getsize(p) for p in summary["outputs"] if os.path.exists(p)}
+    pages = summary["records"] + summary["errors"]
+    return {"pages": pages, "records": summary["records"], "errors": summary["errors"],
+            "seconds": round(seconds, 3), "pages_per_s": round(pages / seconds, 2) if seconds else None,
+            "parse_ms_per_page": stages.get("parse", {}).get("mean_ms"),
+            "peak_rss_mb": peak_rss_mb(), "rss_before_mb": rss_before,
+            "output_bytes": sum(outputs.values()), "outputs": outputs,
+            "stages": stages, "counters": metrics["counters"]}
+
+def run_scrape(base: str, site: SyntheticSite, work_dir: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Live run against the local server, then the same pages replayed from the HTML cache
+    (parse + write throughput with no network at all)."""
+    L.BASE = base
+    cache_dir = os.path.join(work_dir, "html_cache")
+    fetch_opts = {"fetcher": args.fetcher, "delay": 0.0, "min_delay": 0.0, "max_delay": 1.0, "headless": True,
+                  "proxy": None, "cookie": None, "verbose": False, "http_connections": max(8, args.concurrency),
+                  "cache_dir": cache_dir, "cache_max_age": 0, "cache_max_mb": 0, "from_cache": False,
+                  "lean": args.fetcher == "browser", "block_types": L.LEAN_BLOCK_TYPES, "block_hosts": L.LEAN_BLOCK_HOSTS,
+                  "state_path": None, "load_stats": False}
+    scrape_kw = dict(delay=0.0, max_pages=None, no_warmup=True, verbose=False, flush_every=100, debug_html_max=0,
+                     concurrency=args.concurrency, parse_workers=args.parse_workers, parser=args.parser,
+                     discovery="crawl" if args.fetcher == "browser" else "sitemap")
+    results = {}
+    for mode in ("live", "replay"):
+        out_dir = os.path.join(work_dir, mode)
+        opts = dict(fetch_opts, from_cache=mode == "replay")
+        fetcher = L.make_fetcher(opts)
+        rss = peak_rss_mb()
+        t0 = time.perf_counter()
+        try: summary = L.scrape_oem(site.oem, fetcher, output_dir=out_dir, **scrape_kw)
+        finally: fetcher.close()
+        results[mode] = _scrape_result(summary, time.perf_counter() - t0, rss)
+    return results
+
+def _bench(fn: Callable[[], Any], repeat: int) -> float:
+    """Best-of-`repeat` seconds per call (timeit picks the loop count)."""
+    t = timeit.Timer(fn)
+    loops, _ = t.autorange()
+    return min(t.repeat(repeat=repeat, number=loops)) / loops
+
+def _peak_kb(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    try: fn(); return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally: tracemalloc.stop()
+
+def run_micro(site: SyntheticSite, args: argparse.Namespace) -> Dict[str, Any]:
+    pages = [(f"{L.BASE}/{site.oem}/{c}", synth_detail_page(site.oem, c, site.codes, site.sections, site.table_rows))
+             for c in site.codes[:args.micro_pages]]
+    out: Dict[str, Any] = {"pages": len(pages), "page_kb_avg": round(sum(len(h) for _, h in pages) / len(pages) / 1024, 2)}
+    parse: Dict[str, float] = {}
+    for name in sorted(L.PARSER_BACKENDS):
+        try: L.get_parser_backend(name)
+        except SystemExit: continue
+        parse[name] = round(_bench(lambda: [L.parse_detail_page(h, u, parser=name) for u, h in pages], args.repeat)
+                            / len(pages) * 1000, 4)
+    out["parse_detail_page_ms"] = parse
+    soups = [L.BeautifulSoup(h, "html.parser") for _, h in pages]
+    out["extract_sections_ms"] = round(_bench(lambda: [L.extract_sections(s) for s in soups], args.repeat) / len(soups) * 1000, 4)
+    out["stream_sections_ms"] = round(_bench(lambda: [L.stream_sections(h) for _, h in pages], args.repeat) / len(pages) * 1000, 4)
+    # peak Python allocations for one (the largest) page: soup + walk vs the event stream
+    big = max((h for _, h in pages), key=len)
+    out["extract_sections_peak_kb"] = _peak_kb(lambda: L.extract_sections(L.BeautifulSoup(big, "html.parser")))
+    out["stream_sections_peak_kb"] = _peak_kb(lambda: L.stream_sections(big))
+    codes = site.codes
+    out["dtc_to_hex_triplet_us"] = round(_bench(lambda: [L.dtc_to_hex_triplet(c) for c in codes], args.repeat) / len(codes) * 1e6, 4)
+    return out
+
+# ------------------------------- run to run compare -----------------------------
+# (json path, True when bigger is better); changes beyond --tolerance the wrong way are regressions
+TRACKED = [("scrape.live.pages_per_s", True), ("scrape.replay.pages_per_s", True),
+           ("scrape.live.parse_ms_per_page", False), ("scrape.replay.parse_ms_per_page", False),
+           ("scrape.live.peak_rss_mb", False), ("scrape.live.output_bytes", False),
+           ("micro.extract_sections_ms", False), ("micro.stream_sections_ms", False),
+           ("micro.stream_sections_peak_kb", False), ("micro.dtc_to_hex_triplet_us", False)]
+
+def _get(d: Dict[str, Any], path: str) -> Optional[float]:
+    for k in path.split("."):
+        if not isinstance(d, dict) or k not in d: return None
+        d = d[k]
+    return d if isinstance(d, (int, float)) else None
+
+def compare_results(old: Dict[str, Any], new: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print old -> new for the tracked numbers; returns the regressed ones."""
+    tracked = TRACKED + [(f"micro.parse_detail_page_ms.{b}", False) for b in new.get("micro", {}).get("parse_detail_page_ms", {})]
+    if old.get("params") != new.get("params"): print("Note: runs used different parameters; deltas are indicative only")
+    regressions = []
+    print(f"{'metric':<40} {'old':>12} {'new':>12} {'change':>8}")
+    for path, higher_better in tracked:
+        a, b = _get(old, path), _get(new, path)
+        if a is None or b is None: continue
+        change = (b - a) / a * 100 if a else 0.0
+        worse = change < -tolerance if higher_better else change > tolerance
+        if worse: regressions.append(path)
+        print(f"{path:<40} {a:>12g} {b:>12g} {change:>+7.1f}%" + ("  REGRESSION" if worse else ""))
+    return regressions
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception: return None
+
+# -------------------------------------- CLI -------------------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Offline benchmark: synthetic dtcdecode site + local server + scrape_oem")
+    ap.add_argument("--codes", type=int, default=2000, help="DTC detail pages on the synthetic site")
+    ap.add_argument("--per-page", type=int, default=100, help="DTC links per listing page")
+    ap.add_argument("--sections", type=int, default=6, help="Sections per detail page")
+    ap.add_argument("--table-rows", type=int, default=6, help="Rows per detail-page table")
+    ap.add_argument("--seed", type=int, default=0, help="Site generator seed")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Server-side delay per response")
+    ap.add_argument("--throttle-every", type=int, default=0, metavar="N",
+                    help="Answer every Nth detail-page request with 429 + Retry-After (exercises the retry path)")
+    ap.add_argument("--throttle-stuck", type=int, default=0, metavar="N",
+                    help="The first N DTC pages always answer 429 (retries run out; they must end up as errors)")
+    ap.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with each 429")
+    ap.add_argument("--fetcher", choices=["http", "browser"], default="http",
+                    help="http: aiohttp + sitemap discovery; browser: Chromium listing crawl with load-more")
+    ap.add_argument("--concurrency", type=int, default=4, help="Fetch workers (scrape_oem --concurrency)")
+    ap.add_argument("--parse-workers", type=int, default=0, help="Parse processes (scrape_oem --parse-workers)")
+    ap.add_argument("--parser", choices=sorted(L.PARSER_BACKENDS), default="bs4", help="Backend for the end-to-end runs")
+    ap.add_argument("--micro-pages", type=int, default=200, help="Pages in the micro-benchmark corpus")
+    ap.add_argument("--repeat", type=int, default=5, help="Micro-benchmark repeats (best is kept)")
+    ap.add_argument("--skip-scrape", action="store_true", help="Micro-benchmarks only")
+    ap.add_argument("--work-dir", type=str, default=None, help="Keep scrape outputs here (default: a temp dir, removed)")
+    ap.add_argument("--out", type=str, default=None, help="Result JSON (default: <tmpdir>/dtc_bench_results/bench_<timestamp>.json)")
+    ap.add_argument("--compare", type=str, default=None, help="Earlier result JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=15.0, help="Percent change counted as a regression")
+    args = ap.parse_args()
+
+    site_kw = dict(n_codes=args.codes, per_page=args.per_page, sections=args.sections,
+                   table_rows=args.table_rows, seed=args.seed)
+    throttle = {"every": args.throttle_every, "stuck": args.throttle_stuck, "retry_after": args.retry_after}
+    params = dict(site_kw, latency_ms=args.latency_ms, throttle=throttle, fetcher=args.fetcher, concurrency=args.concurrency,
+                  parse_workers=args.parse_workers, parser=args.parser, micro_pages=args.micro_pages)
+    site = SyntheticSite(**site_kw)
+    result: Dict[str, Any] = {"version": 1, "started": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+                              "python": platform.python_version(), "platform": platform.platform(),
+                              "cpus": os.cpu_count(), "params": params}
+    if not args.skip_scrape:
+        work_dir = args.work_dir or tempfile.mkdtemp(prefix="dtc_bench_")
+        base, proc = start_server(site_kw, args.latency_ms / 1000, throttle)
+        print(f"Synthetic site: {len(site.codes)} DTCs at {base}")
+        try: result["scrape"] = run_scrape(base, site, work_dir, args)
+        finally:
+            proc.terminate(); proc.join()
+            if not args.work_dir: shutil.rmtree(work_dir, ignore_errors=True)
+    print("Micro-benchmarks…")
+    result["micro"] = run_micro(site, args)
+
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("bench_%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f: json.dump(result, f, indent=2)
+
+    print("\n=== Results ===")
+    for mode, r in result.get("scrape", {}).items():
+        print(f"  {mode:<7} {r['pages']:>6} pages {r['pages_per_s']:>9} pages/s  parse {r['parse_ms_per_page']} ms/page  "
+              f"peak RSS {r['peak_rss_mb']} MB  outputs {r['output_bytes'] / 1e6:.2f} MB  errors {r['errors']}")
+    m = result["micro"]
+    print("  parse_detail_page  " + ", ".join(f"{k} {v} ms" for k, v in m["parse_detail_page_ms"].items()))
+    print(f"  extract_sections   {m['extract_sections_ms']} ms/page, peak {m['extract_sections_peak_kb']} KB   "
+          f"stream_sections {m['stream_sections_ms']} ms/page, peak {m['stream_sections_peak_kb']} KB")
+    print(f"  dtc_to_hex_triplet {m['dtc_to_hex_triplet_us']} us")
+    print(" -", out)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f: old = json.load(f)
+        print()
+        regressions = compare_results(old, result, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:g}%"); sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vectorized (NumPy) batch encoding/decoding of DTC codes, for joining millions of decoded
+trace DTCs against the scraped definitions.
+
+- encode_codes(["P0A3B-00", ...])  -> uint32 24-bit DTCs  (== Landrover.dtc_to_int)
+- decode_dtcs(values)              -> codes, letters, base codes, FMI bytes/hex/meanings
+- decode_buffer(raw, record_size)  -> 24-bit DTCs (+ status bytes) from packed 0x59 records
+- hex_triplets(values)             -> "0A 3B 00" strings (== Landrover.dtc_to_hex_triplet)
+
+Results match the scalar functions exactly; codes the scalar path would reject come back
+as INVALID instead of raising.
+
+Install:
+  python -m pip install numpy
+"""
+
+from typing import Iterable, NamedTuple, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise SystemExit("numpy not installed. Run:\n"
+                     "  python -m pip install numpy") from e
+
+from Landrover import DTC_LETTER_BITS, DTC_LETTERS, DTC_SEGMENT_RE, FMI_MEANINGS
+
+INVALID = np.uint32(0xFFFFFFFF)
+
+# ------------------------------- lookup tables ----------------------------------
+# Character classes are read off DTC_SEGMENT_RE itself so the two can't drift apart.
+def _char_lut(template: str, pos: int, values) -> np.ndarray:
+    lut = np.full(128, -1, dtype=np.int16)
+    for c in range(128):
+        ch = chr(c)
+        if DTC_SEGMENT_RE.match(template[:pos] + ch + template[pos + 1:]): lut[c] = values(ch)
+    return lut
+
+_LETTER_LUT = _char_lut("P0000-00", 0, lambda ch: DTC_LETTER_BITS[ch.upper()])
+_HEX_LUT = _char_lut("P0000-00", 1, lambda ch: int(ch, 16))
+_DASH_LUT = _char_lut("P0000-00", 5, lambda ch: 0)
+
+_HEX_CHARS = np.frombuffer("0123456789ABCDEF".encode("utf-32-le"), dtype=np.uint32)
+_LETTER_CHARS = np.frombuffer(DTC_LETTERS.encode("utf-32-le"), dtype=np.uint32)
+_FMI_LUT = np.array([FMI_MEANINGS.get(f"{i:02X}", "") for i in range(256)])
+
+def fmi_meanings(fmi: np.ndarray) -> np.ndarray:
+    """Meanings for an array of failure-type bytes (== Landrover.fmi_meaning per element)."""
+    return _FMI_LUT[np.asarray(fmi, dtype=np.uint8)]
+
+# ---------------------------------- encoding ------------------------------------
+def encode_codes(codes: Union[Iterable[str], np.ndarray]) -> np.ndarray:
+    """'B1A23-11'-style strings (any case) -> uint32 24-bit DTCs; INVALID where the scalar
+    dtc_to_int would fail (bad shape, or first digit above 3)."""
+    arr = np.asarray(codes if isinstance(codes, np.ndarray) else list(codes), dtype=str)
+    n = arr.size
+    out = np.full(n, INVALID, dtype=np.uint32)
+    if n == 0: return out
+    arr = arr.reshape(-1)
+    ok = np.char.str_len(arr) == 8
+    cps = arr.astype("U8").view(np.uint32).reshape(n, 8)
+    cps = np.where(cps < 128, cps, 0)
+    letter = _LETTER_LUT[cps[:, 0]]
+    digits = _HEX_LUT[cps[:, [1, 2, 3, 4, 6, 7]]]
+    ok &= (letter >= 0) & (_DASH_LUT[cps[:, 5]] == 0) & (digits >= 0).all(axis=1) & (digits[:, 0] <= 3)
+    d = digits.astype(np.uint32)
+    val = ((letter.astype(np.uint32) << 22) | (d[:, 0] << 20) | (d[:, 1] << 16) | (d[:, 2] << 12)
+           | (d[:, 3] << 8) | (d[:, 4] << 4) | d[:, 5])
+    out[ok] = val[ok]
+    return out
+
+# ---------------------------------- decoding ------------------------------------
+class DecodedDtcs(NamedTuple):
+    values: np.ndarray       # uint32 24-bit DTC
+    codes: np.ndarray        # 'B1A23-11'
+    letters: np.ndarray      # 'B'
+    base_codes: np.ndarray   # 'B1A23'
+    fmi: np.ndarray          # uint8 failure-type byte (index into the FMI meaning table)
+    fmi_hex: np.ndarray      # '11'
+    fmi_meanings: np.ndarray # 'Circuit short to ground'
+
+def _hex(v: np.ndarray) -> np.ndarray: return _HEX_CHARS[v & 0xF]
+
+def decode_dtcs(values: Union[Iterable[int], np.ndarray]) -> DecodedDtcs:
+    v = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=np.uint32).reshape(-1)
+    n = v.size
+    cps = np.empty((n, 8), dtype=np.uint32)
+    cps[:, 0] = _LETTER_CHARS[(v >> 22) & 0x3]
+    cps[:, 1] = _hex(v >> 20 & 0x3); cps[:, 2] = _hex(v >> 16); cps[:, 3] = _hex(v >> 12); cps[:, 4] = _hex(v >> 8)
+    cps[:, 5] = ord("-")
+    cps[:, 6] = _hex(v >> 4); cps[:, 7] = _hex(v)
+    codes = cps.view("U8").reshape(n)
+    fmi = (v & 0xFF).astype(np.uint8)
+    return DecodedDtcs(values=v, codes=codes,
+                       letters=np.ascontiguousarray(cps[:, :1]).view("U1").reshape(n),
+                       base_codes=np.ascontiguousarray(cps[:, :5]).view("U5").reshape(n),
+                       fmi=fmi, fmi_hex=np.ascontiguousarray(cps[:, 6:]).view("U2").reshape(n),
+                       fmi_meanings=_FMI_LUT[fmi])
+
+def hex_triplets(values: Union[Iterable[int], np.ndarray]) -> np.ndarray:
+    """uint32 DTCs -> 'HH MM LL' strings, as dtc_to_hex_triplet prints them."""
+    v = np.asarray(values if isinstance(values, np.ndarray) else list(values), dtype=np.uint32).reshape(-1)
+    cps = np.empty((v.size, 8), dtype=np.uint32)
+    for col, shift in ((0, 20), (1, 16), (3, 12), (4, 8), (6, 4), (7, 0)): cps[:, col] = _hex(v >> shift)
+    cps[:, 2] = cps[:, 5] = ord(" ")
+    return cps.view("U8").reshape(v.size)
+
+def decode_buffer(raw: Union[bytes, bytearray, memoryview, np.ndarray], record_size: int=3,
+                  offset: int=0) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Packed DTC records (3 bytes, or 4 with the UDS status byte) -> (uint32 DTCs, status or None).
+    A trailing partial record is ignored."""
+    if record_size not in (3, 4): raise ValueError("record_size must be 3 or 4")
+    b = np.frombuffer(raw, dtype=np.uint8, offset=offset) if not isinstance(raw, np.ndarray) else raw[offset:].astype(np.uint8, copy=False)
+    b = b[:b.size - b.size % record_size].reshape(-1, record_size)
+    vals = (b[:, 0].astype(np.uint32) << 16) | (b[:, 1].astype(np.uint32) << 8) | b[:, 2]
+    return vals, (b[:, 3].copy() if record_size == 4 else None)
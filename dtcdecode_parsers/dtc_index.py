@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact binary DTC lookup index built from the scraper's <OEM>_dtcs.ndjson streams.
+
+- One file can hold many OEMs; keys are uint32 (OEM id << 24 | 24-bit UDS DTC)
+- Reader mmaps the file and binary-searches the key array in place: no parse at startup
+- Decode raw 0x19/0x59 DTC bytes straight from a trace (3 bytes: high, mid, failure type)
+
+Layout (little-endian):
+  header   64 bytes  magic, version, counts and section offsets (HEADER below)
+  keys     n  x u32  sorted
+  entries  n  x 4 u32  string offsets: dtc, definition, fmi_meaning, url (NO_STR = missing)
+  oems     m  x u32  string offsets of OEM names, indexed by OEM id
+  strings  u32 length + UTF-8 bytes each, deduplicated
+
+Usage:
+  python dtc_index.py build dtcs.idx Land-Rover_dtcs.ndjson Jaguar_dtcs.ndjson
+  python dtc_index.py lookup dtcs.idx "9A 23 11" [--oem Land-Rover]
+"""
+
+import argparse, bisect, mmap, os, struct, sys
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from Landrover import DTC_SEGMENT_RE, dtc_to_int, iter_ndjson
+
+MAGIC = b"DTCIDX\x00"
+VERSION = 1
+HEADER = struct.Struct("<7sBIIIIIII28x")  # magic, version, n, m, keys, entries, oems, strings, strings_len
+ENTRY = struct.Struct("<IIII")
+NO_STR = 0xFFFFFFFF
+MAX_OEMS = 256
+
+class DtcEntry(NamedTuple):
+    oem: str
+    dtc: str
+    definition: Optional[str]
+    fmi_meaning: Optional[str]
+    url: Optional[str]
+
+def oem_from_path(path: str) -> str:
+    name = os.path.basename(path)
+    for suffix in ("_dtcs.ndjson", ".ndjson"):
+        if name.endswith(suffix): return name[:-len(suffix)]
+    return name
+
+# ----------------------------------- builder ------------------------------------
+def build_index(sources: Iterable[Tuple[str, str]], out_path: str) -> int:
+    """sources: (oem, ndjson path). Later records for the same OEM+DTC win.
+    Returns the number of entries written."""
+    strings = bytearray()
+    str_off: Dict[str, int] = {}
+    def intern(s: Optional[str]) -> int:
+        if s is None: return NO_STR
+        off = str_off.get(s)
+        if off is None:
+            b = s.encode("utf-8")
+            off = str_off[s] = len(strings)
+            strings.extend(struct.pack("<I", len(b))); strings.extend(b)
+        return off
+
+    oems: List[str] = []
+    entries: Dict[int, Tuple[int, int, int, int]] = {}
+    for oem, path in sources:
+        if oem not in oems:
+            if len(oems) == MAX_OEMS: raise ValueError(f"more than {MAX_OEMS} OEMs in one index")
+            oems.append(oem)
+        oem_id = oems.index(oem)
+        for rec in iter_ndjson(path):
+            dtc = rec.get("dtc")
+            if rec.get("error") or not dtc or not DTC_SEGMENT_RE.match(dtc): continue
+            try: key = (oem_id << 24) | dtc_to_int(dtc)
+            except ValueError: continue
+            entries[key] = (intern(dtc.upper()), intern(rec.get("definition")),
+                            intern(rec.get("fmi_meaning") or None), intern(rec.get("url")))
+    oem_offs = [intern(o) for o in oems]
+
+    keys = sorted(entries)
+    n, m = len(keys), len(oems)
+    keys_off = HEADER.size
+    entries_off = keys_off + 4 * n
+    oems_off = entries_off + ENTRY.size * n
+    strings_off = oems_off + 4 * m
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n, m, keys_off, entries_off, oems_off, strings_off, len(strings)))
+        f.write(struct.pack(f"<{n}I", *keys))
+        for k in keys: f.write(ENTRY.pack(*entries[k]))
+        f.write(struct.pack(f"<{m}I", *oem_offs))
+        f.write(strings)
+    os.replace(tmp, out_path)
+    return n
+
+# ----------------------------------- reader -------------------------------------
+class _LittleEndianKeys:
+    """Sequence view of the key array for big-endian hosts (memoryview.cast is native-order)."""
+    def __init__(self, buf, n: int): self._buf, self._n = buf, n
+    def __len__(self): return self._n
+    def __getitem__(self, i: int) -> int: return struct.unpack_from("<I", self._buf, 4 * i)[0]
+
+class DtcIndex:
+    """mmap'd reader. Lookups bisect the on-disk key array; only the strings of a hit are decoded."""
+    def __init__(self, path: str):
+        self._f = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, self.m, keys_off, self._entries_off, oems_off, self._strings_off, _ = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION: raise ValueError(f"{path}: not a v{VERSION} DTC index")
+        self._buf = memoryview(self._mm)
+        self._key_bytes = self._buf[keys_off:keys_off + 4 * self.n]
+        self._keys = self._key_bytes.cast("I") if sys.byteorder == "little" else _LittleEndianKeys(self._key_bytes, self.n)
+        self.oems = [self._str(off) for off in struct.unpack_from(f"<{self.m}I", self._mm, oems_off)]
+        self._oem_ids = {o: i for i, o in enumerate(self.oems)}
+
+    def _str(self, off: int) -> Optional[str]:
+        if off == NO_STR: return None
+        p = self._strings_off + off
+        ln = struct.unpack_from("<I", self._mm, p)[0]
+        return str(self._buf[p + 4:p + 4 + ln], "utf-8")
+
+    def _find(self, key: int) -> int:
+        i = bisect.bisect_left(self._keys, key)
+        return i if i < self.n and self._keys[i] == key else -1
+
+    def _entry(self, i: int) -> DtcEntry:
+        dtc, definition, fmi, url = ENTRY.unpack_from(self._mm, self._entries_off + ENTRY.size * i)
+        return DtcEntry(self.oems[self._keys[i] >> 24], self._str(dtc), self._str(definition), self._str(fmi), self._str(url))
+
+    def lookup(self, dtc24: int, oem: Optional[str]=None) -> Optional[DtcEntry]:
+        """Entry for a 24-bit DTC; without `oem`, the first OEM (in build order) that has it."""
+        if oem is not None:
+            oem_id = self._oem_ids.get(oem)
+            if oem_id is None: return None
+            i = self._find((oem_id << 24) | (dtc24 & 0xFFFFFF))
+            return self._entry(i) if i >= 0 else None
+        for oem_id in range(self.m):
+            i = self._find((oem_id << 24) | (dtc24 & 0xFFFFFF))
+            if i >= 0: return self._entry(i)
+        return None
+
+    def lookup_all(self, dtc24: int) -> List[DtcEntry]:
+        hits = (self._find((oem_id << 24) | (dtc24 & 0xFFFFFF)) for oem_id in range(self.m))
+        return [self._entry(i) for i in hits if i >= 0]
+
+    def lookup_bytes(self, raw: bytes, oem: Optional[str]=None) -> Optional[DtcEntry]:
+        """Raw 3-byte DTC as it appears in a 0x59 response record."""
+        return self.lookup((raw[0] << 16) | (raw[1] << 8) | raw[2], oem)
+
+    def lookup_code(self, dtc: str, oem: Optional[str]=None) -> Optional[DtcEntry]:
+        return self.lookup(dtc_to_int(dtc), oem)
+
+    def __len__(self): return self.n
+
+    def close(self):
+        # exported views must be released before the map can close
+        if isinstance(self._keys, memoryview): self._keys.release()
+        self._key_bytes.release(); self._buf.release(); self._mm.close(); self._f.close()
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+# -------------------------------------- CLI -------------------------------------
+def parse_dtc_arg(s: str) -> int:
+    s = s.strip()
+    if DTC_SEGMENT_RE.match(s): return dtc_to_int(s)
+    return int(s.replace(" ", "").replace("0x", ""), 16)
+
+def main():
+    ap = argparse.ArgumentParser(description="Build / query the binary DTC lookup index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Compile <OEM>_dtcs.ndjson files into one index")
+    b.add_argument("index"); b.add_argument("ndjson", nargs="+")
+    q = sub.add_parser("lookup", help="Look up DTCs (e.g. '9A 23 11', 9A2311, B1A23-11)")
+    q.add_argument("index"); q.add_argument("dtc", nargs="+")
+    q.add_argument("--oem", type=str, default=None, help="Restrict to one OEM")
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        n = build_index([(oem_from_path(p), p) for p in args.ndjson], args.index)
+        print(f"{args.index}: {n} DTCs from {len(args.ndjson)} file(s), {os.path.getsize(args.index)} bytes")
+        return
+    with DtcIndex(args.index) as idx:
+        for d in args.dtc:
+            key = parse_dtc_arg(d)
+            hits = [idx.lookup(key, args.oem)] if args.oem else idx.lookup_all(key)
+            hits = [h for h in hits if h]
+            if not hits: print(f"{key:06X}: not found"); continue
+            for h in hits:
+                print(f"{key:06X}: [{h.oem}] {h.dtc} – {h.definition or ''}" + (f" ({h.fmi_meaning})" if h.fmi_meaning else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""--sink sqlite fed from the --parse-workers writer thread (python -m pytest test_sqlite_sink.py)."""
+
+import sqlite3, threading
+
+import Landrover as L
+from bench_scrape import synth_codes, synth_detail_page
+
+OEM = "Land-Rover"
+
+def _cached_site(root: str, n: int) -> L.HtmlCache:
+    cache = L.HtmlCache(root)
+    codes = synth_codes(n, seed=1)
+    for code in codes: cache.put(f"{L.BASE}/{OEM}/{code}", synth_detail_page(OEM, code, codes, sections=2, table_rows=2))
+    return cache
+
+def test_parse_workers_fill_sqlite(tmp_path):
+    n = 1200  # more than two SqliteSink batches, so flushes happen on the writer thread
+    cache = _cached_site(str(tmp_path / "cache"), n)
+    out = str(tmp_path / "out")
+    summary = L.scrape_oem(OEM, L.CacheOnlyFetcher(cache), delay=0, max_pages=None, no_warmup=True, verbose=False,
+                           output_dir=out, flush_every=100, debug_html_max=0, parse_workers=2, sink="sqlite",
+                           progress=lambda done, total: None)
+    assert summary["errors"] == 0 and summary["records"] == n
+    con = sqlite3.connect(summary["sqlite"])
+    try: assert con.execute("SELECT COUNT(*) FROM dtcs WHERE oem=?", (OEM,)).fetchone()[0] == n
+    finally: con.close()
+
+def test_failed_batch_is_kept(tmp_path):
+    sink = L.SqliteSink(str(tmp_path / "dtcs.sqlite"), OEM, batch=2)
+    rec, rec2 = L.Record("B1A23-11", f"{L.BASE}/{OEM}/B1A23-11", None), L.Record("B1A23-12", f"{L.BASE}/{OEM}/B1A23-12", None)
+    rec.sections = rec2.sections = []
+    blocker = sqlite3.connect(sink.path, timeout=0, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    sink._db.execute("PRAGMA busy_timeout=0")
+    errors = []
+    def add_two():
+        try: sink.add(rec); sink.add(rec2)
+        except sqlite3.OperationalError as e: errors.append(e)
+    t = threading.Thread(target=add_two); t.start(); t.join()
+    assert errors and len(sink._buf) == 2  # locked out: nothing dropped
+    blocker.execute("ROLLBACK"); blocker.close()
+    sink.close()
+    con = sqlite3.connect(sink.path)
+    try: assert con.execute("SELECT COUNT(*) FROM dtcs").fetchone()[0] == 2
+    finally: con.close()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pull the DTCs out of diagnostic trace logs and join them against the scraped definitions.
+
+- Each log is mmap'd and streamed line by line (no whole-file reads); files fan out over a
+  process pool, throughput is reported as MB/s and lines/s
+- `cmd[0x5000]` lines already carry reassembled UDS payloads; raw CAN frames (0x4000, 0x4100,
+  0x5100, 0x7F78) go through ISO-TP reassembly (single / first / consecutive frames)
+- 0x59 ReadDTCInformation responses -> 3-byte DTC + status byte, batch-decoded with dtc_codec
+- Definitions come from a dtc_index file (--index) or straight from <OEM>_dtcs.ndjson (--dtcs);
+  --oem X looks codes up under X only (no match -> no definition), otherwise a log under
+  TraceLogsComplete/<Make>/... prefers the index OEM with the same name and falls back to any OEM
+
+Usage:
+  python trace_dtcs.py ../ExamplesForClaude/TraceLogsComplete --dtcs out/Land-Rover_dtcs.ndjson
+  python trace_dtcs.py logs/ --index dtcs.idx --out trace_dtcs.csv --workers 8
+"""
+
+import argparse, binascii, csv, mmap, os, re, tempfile, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from tqdm import tqdm
+
+from Landrover import dtc_to_hex_triplet
+from dtc_codec import decode_buffer, decode_dtcs
+from dtc_index import DtcIndex, build_index, oem_from_path
+
+# `12:59:43.747 | [Remote]->[Local] DATA => mod[CAN1] [FORD ISOTP] cmd[0x5000] args[0x072E,...] data[0x5902...]`
+# (the logger HTML-escapes the arrows)
+LINE_RE = re.compile(rb"(\S+) \| \[Remote\](?:-&gt;|->)\[\w+\] DATA (?:=&gt;|=>) mod\[([^\]]*)\] \[[^\]]*\] "
+                     rb"cmd\[0x([0-9A-Fa-f]+)\] args\[0x([0-9A-Fa-f]+)[^\]]*\](?: \w+\[[^\]]*\])* data\[0x([0-9A-Fa-f]*)\]")
+PAYLOAD_CMDS = {0x5000}
+FRAME_CMDS = {0x4000, 0x4100, 0x5100, 0x7F78}
+
+STATUS_BITS = ("TF", "TFTOC", "PDTC", "CDTC", "TNCSLC", "TFSLC", "TNCTOC", "WIR")  # ISO 14229 DTC status bits 0..7
+def status_flags(status: int) -> str: return "|".join(n for i, n in enumerate(STATUS_BITS) if status >> i & 1)
+
+OUT_FIELDS = ["file", "time", "bus", "ecu", "subfunction", "dtc", "hex_triplet", "status", "status_flags",
+              "oem", "definition", "fmi_meaning", "url"]
+
+# --------------------------------- ISO-TP ---------------------------------------
+class IsoTpReassembler:
+    """ISO 15765-2 reassembly per (bus, CAN id). feed() returns the payload once it is complete.
+    Flow control frames and anything out of sequence are dropped."""
+    def __init__(self):
+        self._pending: Dict[Tuple[bytes, int], List[Any]] = {}  # key -> [expected_len, next_sn, bytearray]
+
+    def feed(self, key, frame: bytes) -> Optional[bytes]:
+        if not frame: return None
+        kind = frame[0] >> 4
+        if kind == 0:                                   # single frame (CAN-FD escape: length in byte 1)
+            n, start = (frame[0] & 0xF, 1) if frame[0] & 0xF else ((frame[1] if len(frame) > 1 else 0), 2)
+            self._pending.pop(key, None)
+            return frame[start:start + n] if 0 < n <= len(frame) - start else None
+        if kind == 1:                                   # first frame (12-bit length, or 32-bit escape)
+            n, start = ((frame[0] & 0xF) << 8 | frame[1], 2) if len(frame) > 1 else (0, 2)
+            if n == 0 and len(frame) >= 6: n, start = int.from_bytes(frame[2:6], "big"), 6
+            if n == 0: return None
+            self._pending[key] = [n, 1, bytearray(frame[start:])]
+            return None
+        if kind == 2:                                   # consecutive frame
+            st = self._pending.get(key)
+            if st is None: return None
+            if frame[0] & 0xF != st[1]: del self._pending[key]; return None
+            st[1] = (st[1] + 1) & 0xF; st[2] += frame[1:]
+            if len(st[2]) >= st[0]:
+                del self._pending[key]
+                return bytes(st[2][:st[0]])
+        return None
+
+# ------------------------------ 0x59 responses ----------------------------------
+# sub-function -> (offset of the first record, record size, offset of the DTC inside a record)
+DTC_RECORD_LAYOUTS = {
+    0x02: (3, 4, 0), 0x0A: (3, 4, 0), 0x0F: (3, 4, 0), 0x13: (3, 4, 0), 0x15: (3, 4, 0),
+    0x17: (4, 4, 0),                                    # memory selection byte first
+    0x08: (3, 6, 2), 0x09: (3, 6, 2),                   # severity + functional unit before the DTC
+    0x03: (2, 4, 0),                                    # DTC + snapshot record number
+}
+SINGLE_RECORD_SUBFUNCTIONS = {0x04, 0x06, 0x10}         # one DTC + status, then snapshot/extended data
+
+def dtc_records(payload: bytes) -> Tuple[int, bytes, List[int]]:
+    """0x59 payload -> (sub-function, packed 3-byte DTCs, status bytes); status is -1 where the
+    response carries none (0x03)."""
+    sub = payload[1] if len(payload) > 1 else -1
+    if sub in SINGLE_RECORD_SUBFUNCTIONS:
+        return (sub, payload[2:5], [payload[5]]) if len(payload) >= 6 else (sub, b"", [])
+    layout = DTC_RECORD_LAYOUTS.get(sub)
+    if layout is None: return sub, b"", []
+    start, size, at = layout
+    dtcs, status = bytearray(), []
+    for p in range(start, len(payload) - size + 1, size):
+        dtcs += payload[p + at:p + at + 3]
+        status.append(-1 if sub == 0x03 else payload[p + at + 3])
+    return sub, bytes(dtcs), status
+
+# --------------------------------- per file -------------------------------------
+class FileResult(NamedTuple):
+    path: str
+    size: int
+    lines: int
+    responses: int
+    rows: List[Dict[str, Any]]
+    seconds: float
+
+def _norm(s: str) -> str: return re.sub(r"[^a-z0-9]", "", s.lower())
+
+def _oem_for(path: str, root: str, oems: List[str]) -> Optional[str]:
+    rel = os.path.relpath(path, root).split(os.sep)
+    if len(rel) < 2: return None
+    by_norm = {_norm(o): o for o in oems}
+    return by_norm.get(_norm(rel[0]))
+
+def scan_file(path: str, root: str, index_path: Optional[str]=None, oem: Optional[str]=None) -> FileResult:
+    """Stream one log; returns every DTC record found, joined against the index when given
+    (under `oem` only when it is set, see the module docstring)."""
+    t0 = time.perf_counter()
+    size = os.path.getsize(path)
+    lines = responses = 0
+    meta: List[Tuple[str, str, str, int, int]] = []    # time, bus, ecu, sub-function, status
+    packed = bytearray()
+    isotp = IsoTpReassembler()
+    if size:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                lines += 1
+                if b"[Remote]" not in line: continue
+                m = LINE_RE.match(line)
+                if not m: continue
+                ts, bus, cmd, can_id, data = m.groups()
+                cmd = int(cmd, 16)
+                if cmd in PAYLOAD_CMDS:
+                    if not data.startswith(b"59"): continue
+                    payload = binascii.unhexlify(data[:len(data) & ~1])
+                elif cmd in FRAME_CMDS:
+                    payload = isotp.feed((bus, can_id), binascii.unhexlify(data[:len(data) & ~1]))
+                    if not payload or payload[0] != 0x59: continue
+                else:
+                    continue
+                responses += 1
+                sub, dtcs, status = dtc_records(payload)
+                packed += dtcs
+                t, b, e = ts.decode(), bus.decode(), "0x" + can_id.decode().upper()
+                meta.extend((t, b, e, sub, s) for s in status)
+
+    rows: List[Dict[str, Any]] = []
+    if meta:
+        vals, _ = decode_buffer(bytes(packed), 3)
+        dec = decode_dtcs(vals)
+        idx = DtcIndex(index_path) if index_path else None
+        try:
+            # an explicit OEM is a hard filter: B/U codes are manufacturer-specific
+            want = oem or (_oem_for(path, root, idx.oems) if idx else None)
+            hits: Dict[int, Any] = {}
+            rel = os.path.relpath(path, root)
+            for i, (t, b, e, sub, s) in enumerate(meta):
+                v = int(vals[i])
+                if idx is not None and v not in hits:
+                    hits[v] = idx.lookup(v, oem) if oem else (want and idx.lookup(v, want)) or idx.lookup(v)
+                hit = hits.get(v)
+                code = str(dec.codes[i])
+                rows.append({"file": rel, "time": t, "bus": b, "ecu": e, "subfunction": f"0x{sub:02X}",
+                             "dtc": code, "hex_triplet": dtc_to_hex_triplet(code),
+                             "status": "" if s < 0 else f"0x{s:02X}", "status_flags": "" if s < 0 else status_flags(s),
+                             "oem": hit.oem if hit else "", "definition": (hit.definition or "") if hit else "",
+                             "fmi_meaning": str(dec.fmi_meanings[i]), "url": (hit.url or "") if hit else ""})
+        finally:
+            if idx is not None: idx.close()
+    return FileResult(path, size, lines, responses, rows, time.perf_counter() - t0)
+
+def _scan_job(job): return scan_file(*job)
+
+def find_logs(paths: List[str], exts=(".txt", ".log", ".asc")) -> List[Tuple[str, str]]:
+    """(file, root) pairs; the root is what OEM folder names are taken relative to."""
+    out = []
+    for p in paths:
+        if os.path.isfile(p): out.append((p, os.path.dirname(p) or ".")); continue
+        for d, _, files in os.walk(p):
+            out.extend((os.path.join(d, fn), p) for fn in sorted(files) if fn.lower().endswith(exts))
+    return out
+
+# ----------------------------------- main ---------------------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Extract 0x59 DTC responses from trace logs and join them "
+                                             "against the scraped DTC definitions")
+    ap.add_argument("paths", nargs="+", help="Log files or directories (searched recursively)")
+    ap.add_argument("--index", type=str, default=None, help="dtc_index.py index file to join against")
+    ap.add_argument("--dtcs", nargs="+", default=None, help="<OEM>_dtcs.ndjson files to join against "
+                                                            "(a temporary index is built from them)")
+    ap.add_argument("--oem", type=str, default=None, help="Look DTCs up under this OEM only, leaving other codes without a definition "
+                         "(default: the log's folder OEM first, then any OEM)")
+    ap.add_argument("--out", type=str, default="trace_dtcs.csv", help="CSV of every DTC record found")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes (files are the unit of work)")
+    ap.add_argument("--verbose", action="store_true", help="Per-file throughput")
+    args = ap.parse_args()
+
+    jobs = find_logs(args.paths)
+    if not jobs: raise SystemExit("No log files found.")
+    tmpdir = None
+    index_path = args.index
+    if args.dtcs and not index_path:
+        tmpdir = tempfile.TemporaryDirectory()
+        index_path = os.path.join(tmpdir.name, "dtcs.idx")
+        n = build_index([(oem_from_path(p), p) for p in args.dtcs], index_path)
+        print(f"Indexed {n} DTCs from {len(args.dtcs)} file(s)")
+
+    t0 = time.perf_counter()
+    total_bytes = total_lines = total_responses = total_rows = matched = 0
+    try:
+        with open(args.out, "w", newline="", encoding="utf-8") as fout, \
+             ProcessPoolExecutor(max_workers=max(1, args.workers)) as ex:
+            w = csv.DictWriter(fout, fieldnames=OUT_FIELDS); w.writeheader()
+            work = [(p, root, index_path, args.oem) for p, root in jobs]
+            for r in tqdm(ex.map(_scan_job, work), total=len(work), desc="Logs", unit="file"):
+                w.writerows(r.rows)
+                total_bytes += r.size; total_lines += r.lines; total_responses += r.responses
+                total_rows += len(r.rows); matched += sum(1 for row in r.rows if row["definition"])
+                if args.verbose:
+                    mb = r.size / 1e6
+                    tqdm.write(f"[debug] {r.path}: {mb:.2f} MB, {r.lines} lines, {r.responses} 0x59, {len(r.rows)} DTCs "
+                               f"({mb / max(r.seconds, 1e-9):.1f} MB/s)")
+    finally:
+        if tmpdir is not None: tmpdir.cleanup()
+    dt = max(time.perf_counter() - t0, 1e-9)
+    print(f"{len(jobs)} file(s), {total_bytes / 1e6:.1f} MB, {total_lines} lines in {dt:.2f}s "
+          f"-> {total_bytes / 1e6 / dt:.1f} MB/s, {total_lines / dt:,.0f} lines/s")
+    print(f"{total_responses} 0x59 responses, {total_rows} DTC records"
+          + (f", {matched} with a definition" if index_path else "") + f" -> {args.out}")
+
+if __name__ == "__main__":
+    main()